@@ -1,3 +1,6 @@
+import random
+from typing import NamedTuple
+
 from gym_minigrid.minigrid import *
 from gym_minigrid.register import register
 
@@ -24,6 +27,60 @@ DEFAULT_REWARDS = {
     LAVA_REWARD : -1
 }
 
+class RewardSpec(NamedTuple):
+    """Reward specification with attribute access.
+
+    The field names equal the string constants above, so a reward
+    specification dictionary converts with RewardSpec(**reward_spec).
+    The defaults match DEFAULT_REWARDS.
+    """
+    step_penalty: float = 0
+    goal_reward: float = 1
+    absorbing_states: bool = False
+    absorbing_reward_goal: float = 0
+    absorbing_reward_lava: float = -1
+    risky_tile_reward: float = 0
+    lava_reward: float = -1
+
+# minigrid.DIR_TO_VEC as plain int tuples for cheap scalar arithmetic
+_DIR_TO_VEC_T = tuple(tuple(int(c) for c in vec) for vec in DIR_TO_VEC)
+
+# Map of tile types to integer codes used for array based grid encodings.
+# The codes of the non-floor tiles match their tensor observation channel.
+TILE_TO_IDX = {
+    'empty'         : 0,
+    'wall'          : 1,
+    'lava'          : 2,
+    'goal'          : 3,
+    'spiky_floor'   : 4,
+}
+
+IDX_TO_TILE = dict(zip(TILE_TO_IDX.values(), TILE_TO_IDX.keys()))
+
+_EMPTY = TILE_TO_IDX['empty']
+_WALL = TILE_TO_IDX['wall']
+_LAVA = TILE_TO_IDX['lava']
+_GOAL = TILE_TO_IDX['goal']
+_SPIKY = TILE_TO_IDX['spiky_floor']
+
+# Tiles the agent cannot move away from (absorbing states)
+_ABSORB_TILES = frozenset({_GOAL, _LAVA})
+
+def encode_tiles(grid):
+    """Encodes the tile types of a grid as an int8 array indexed by (x, y).
+
+    Args:
+        grid (Grid): grid containing only RiskyPathEnv tiles.
+
+    Returns:
+        NDArray: (width, height) array of TILE_TO_IDX codes
+    """
+    tiles = np.zeros((grid.width, grid.height), dtype=np.int8)
+    for i, cell in enumerate(grid.grid):
+        if cell is not None:
+            tiles[i % grid.width, i // grid.width] = TILE_TO_IDX[cell.type]
+    return tiles
+
 class RiskyPathEnv(MiniGridEnv):
     
     # Only actions needed are Move {west, north, east, south}
@@ -33,6 +90,9 @@ class RiskyPathEnv(MiniGridEnv):
         east = 2
         south = 3
 
+    # Agent direction (see minigrid.DIR_TO_VEC) indexed by action
+    _ACT_TO_DIR = (2, 3, 0, 1)
+
     def __init__(
         self,
         width=11,
@@ -43,9 +103,10 @@ class RiskyPathEnv(MiniGridEnv):
         lava_positions=None,
         spiky_active=False,
         spiky_positions=None,
-        reward_spec=DEFAULT_REWARDS,
+        reward_spec=RewardSpec(),
         slip_proba=0.,
         wall_rebound=False,
+        verbose_info=False,
         max_steps=150,
         seed=1337,
     ):
@@ -61,16 +122,20 @@ class RiskyPathEnv(MiniGridEnv):
             lava_positions (list, optional): List of lava positions.
             spiky_active (bool): Whether or not to activate/render spiky_tiles.
             spiky_positions (list, optional): list of spiky_tile positions.
-            reward_spec (dict): Defines the reward design.
+            reward_spec (RewardSpec or dict): Defines the reward design.
             slip_proba (float): The probability of agent slipping.
             wall_rebound (bool): Whether walking into walls leads to rebound.
+            verbose_info (bool): Whether step() adds the movement vectors
+                to the info dict.
             max_steps (int): max number of steps per episode.
             seed (int): The seed for the environment's RNG.
         """
 
         # Basic sanity checks
         assert width >= 6 and height >= 6
-        assert reward_spec.keys() == DEFAULT_REWARDS.keys()
+        if isinstance(reward_spec, dict):
+            assert reward_spec.keys() == DEFAULT_REWARDS.keys()
+            reward_spec = RewardSpec(**reward_spec)
         assert slip_proba >= 0 and slip_proba < 1, "Must be a probability"
         assert type(agent_start_pos) is tuple, "Must be a x-y-tuple"
         start_x, start_y = agent_start_pos
@@ -102,15 +167,23 @@ class RiskyPathEnv(MiniGridEnv):
         else:
             temp_spiky_positions = spiky_positions
         
-        assert reward_spec[SPIKY_TILE_REWARD] == 0 or spiky_active, \
+        assert reward_spec.risky_tile_reward == 0 or spiky_active, \
             "Set the spiky tile reward to 0 if spiky tiles are not activated"
 
         # Define instance variables not yet contained in MiniGridEnv
         # These variables don't need to be reset when resetting the env
         # The default MiniGridEnv.reset() can thus be used
-        self.agent_start_pos = np.array(agent_start_pos)
+        self.agent_start_pos = agent_start_pos
         self.slip_proba = slip_proba
         self.reward_spec = reward_spec
+        # bind the rewards to attributes to avoid dict lookups in step()
+        self._r_step = reward_spec.step_penalty
+        self._r_goal = reward_spec.goal_reward
+        self._r_lava = reward_spec.lava_reward
+        self._r_spiky = reward_spec.risky_tile_reward
+        self._r_abs_goal = reward_spec.absorbing_reward_goal
+        self._r_abs_lava = reward_spec.absorbing_reward_lava
+        self._absorbing = reward_spec.absorbing_states
         self.goal_positions = goal_positions
         self.lava_positions = temp_lava_positions
         self.spiky_active = spiky_active
@@ -118,6 +191,15 @@ class RiskyPathEnv(MiniGridEnv):
         self.new_actions = RiskyPathEnv.Actions
         self.show_agent_dir = show_agent_dir
         self.wall_rebound = wall_rebound
+        self.verbose_info = verbose_info
+        self._obs_buf = None
+
+        # Specialize the movement logic for the environment configuration:
+        # without slipping and rebound, the agent either moves or stays
+        if slip_proba == 0 and not wall_rebound:
+            self._move = self._move_forward
+        else:
+            self._move = self._move_general
 
         # Call superclass initialisation
         # As the super __init__() is called, the action_space is set
@@ -154,18 +236,24 @@ class RiskyPathEnv(MiniGridEnv):
         # place the surrounding walls
         self.grid.wall_rect(0, 0, width, height)
 
+        # Lava, spiky and goal tiles carry no state, which is why one
+        # instance per tile type is shared by all positions
+
         # place the lava tiles (relative to bottom left corner)
+        lava = Lava()
         for pos in self.lava_positions:
-            self.put_obj(Lava(), *pos)
+            self.grid.set(*pos, lava)
 
         # place the spiky tiles (relative to bottom left corner)
         if self.spiky_active:
+            spiky_tile = SpikyTile()
             for pos in self.spiky_positions:
-                self.put_obj(SpikyTile(), *pos)
+                self.grid.set(*pos, spiky_tile)
 
         # place the goal tile(s) last to override any other tile
+        goal = Goal()
         for pos in self.goal_positions:
-            self.put_obj(Goal(), *pos)
+            self.grid.set(*pos, goal)
 
         # place the agent looking up
         self.agent_pos = self.agent_start_pos
@@ -174,6 +262,18 @@ class RiskyPathEnv(MiniGridEnv):
         # assign the textual mission string (expected by MiniGrid)
         self.mission = "Get to the green Goal tile"
 
+        # encode the tile types, tiles never move after this point
+        self._type_map = encode_tiles(self.grid)
+        # cells the agent can be on (the border is always made of walls)
+        self._walkable = self._type_map != _WALL
+
+        # precompute the immutable channels of the tensor observation
+        self._static_tensor = self._compute_static_tensor()
+
+        # persistent tensor in which only the agent channel is updated
+        self._tensor_buf = self._static_tensor.copy()
+        self._last_agent_xy = None
+
     def step(self, action):
         """Overrides MiniGridEnv.step()
 
@@ -194,92 +294,45 @@ class RiskyPathEnv(MiniGridEnv):
         """         
 
         self.step_count += 1
-        reward = self.reward_spec[STEP_PENALTY]
+        reward = self._r_step
         done = False
 
+        type_map = self._type_map
         previous_position = self.agent_pos
+        current_tile = type_map[previous_position]
+        slip_now = False
 
         # Only apply movement logic if agent should be able to move
-        if self.can_move:
-            # choose new agent direction according to minigrid.DIR_TO_VEC
-            if action == self.new_actions.west:
-                self.agent_dir = 2
-            elif action == self.new_actions.north:
-                self.agent_dir = 3
-            elif action == self.new_actions.east:
-                self.agent_dir = 0
-            elif action == self.new_actions.south:
-                self.agent_dir = 1
-            else:
-                assert False, "Unknown action."
-
-            # Get the contents of the cell in front of the agent
-            fwd_pos = self.front_pos
-            next_cell = self.grid.get(*fwd_pos)
-
-            # check if the agent slips in this step
-            # check explicitly that slipping is allowed
-            if self.slip_proba > 0:
-                rnd_val = self.np_random.random()  
-                slip_now = rnd_val < self.slip_proba
-            else:
-                slip_now = False
-
-            # move one step and get the reward
-
-            if (next_cell == None or next_cell.can_overlap()) and not slip_now:
-                self.agent_pos = fwd_pos
-            elif self.wall_rebound or slip_now:
-                # rebound/slip
-                # (currently: rebound on walls, closed doors, key, ball, box)
-                # rebound can happen behind agent pos/dir or on the sides
-                # slip can happen to either adjacent side
-                tmp_rebound_slip = []
-                current_pos = np.array(self.agent_pos)
-                current_dir = DIR_TO_VEC[self.agent_dir]
-                behind_pos = current_pos - current_dir
-                tmp_rebound_slip.append(behind_pos)
-                # compute positions perpendicular to agent_dir
-                # and adjacent to agent_pos
-                side_dir = np.flip(current_dir, 0)
-                side_pos_1 = current_pos + side_dir
-                side_pos_2 = current_pos - side_dir
-                tmp_rebound_slip.append(side_pos_1)
-                tmp_rebound_slip.append(side_pos_2)
-                # append position in front of the agent
-                tmp_rebound_slip.append(fwd_pos)
-
-                # get valid options for next cell
-                rebound_slip_options = []
-                for candidate in tmp_rebound_slip:
-                    cell = self.grid.get(*candidate)
-                    # make sure the agent can be on the cell
-                    if cell is None or cell.can_overlap():
-                        rebound_slip_options.append(candidate)
-                
-                # choose from valid candidates or keep current position if empty
-                if len(rebound_slip_options) > 0:
-                    index = self.np_random.choice(len(rebound_slip_options))
-                    self.agent_pos = rebound_slip_options[index]
-
-        # reassign next cell to make sure to check for collisions & rewards
-        next_cell = self.grid.get(*self.agent_pos)
+        # (same check as self.can_move, reusing the current tile)
+        if current_tile not in _ABSORB_TILES:
+            assert 0 <= action < len(self._ACT_TO_DIR), "Unknown action."
+            slip_now = self._move(action)
+
+        # reassign next tile to make sure to check for collisions & rewards
+        # (the position is only ever replaced, never modified in place)
+        if self.agent_pos is previous_position:
+            next_tile = current_tile
+        else:
+            next_tile = type_map[self.agent_pos]
         
-        # check for cells and corresponding rewards / episode end
-        if next_cell != None and next_cell.type == 'goal':
-            if self.reward_spec[ABSORBING_STATES]:
-                reward += self.reward_spec[ABSORBING_REWARD_GOAL]
+        # check for tiles and corresponding rewards / episode end
+        # (a tile has exactly one type, so at most one branch applies)
+        if next_tile == _EMPTY:
+            pass
+        elif next_tile == _GOAL:
+            if self._absorbing:
+                reward += self._r_abs_goal
             else:
                 done = True
-                reward += self.reward_spec[GOAL_REWARD]
-        if next_cell != None and next_cell.type == 'lava':
-            if self.reward_spec[ABSORBING_STATES]:
-                reward += self.reward_spec[ABSORBING_REWARD_LAVA]
+                reward += self._r_goal
+        elif next_tile == _LAVA:
+            if self._absorbing:
+                reward += self._r_abs_lava
             else:
                 done = True
-                reward += self.reward_spec[LAVA_REWARD]
-        if next_cell != None and next_cell.type == 'spiky_floor':
-            reward += self.reward_spec[SPIKY_TILE_REWARD]
+                reward += self._r_lava
+        elif next_tile == _SPIKY:
+            reward += self._r_spiky
 
         # finish the step
         if self.step_count >= self.max_steps:
@@ -290,15 +343,110 @@ class RiskyPathEnv(MiniGridEnv):
         info = {
             "agent_pos" : self.agent_pos,
             "previous_pos" : previous_position,
-            "actual_movement_vec" : self.agent_pos - previous_position,
-            "intended_movement_vec" : DIR_TO_VEC[self.agent_dir],
             "slipped" : slip_now,
-            "current_cell_type" : next_cell.type \
-                if next_cell is not None else None
+            "current_cell_type" : IDX_TO_TILE[next_tile] \
+                if next_tile != _EMPTY else None
         }
+        # movement vectors allocate arrays, only add them on request
+        if self.verbose_info:
+            info["actual_movement_vec"] = np.subtract(
+                self.agent_pos, previous_position
+            )
+            info["intended_movement_vec"] = DIR_TO_VEC[self.agent_dir]
 
         return obs, reward, done, info
 
+    def _move_forward(self, action):
+        """Moves the agent one cell in the direction given by the action,
+        unless that cell is a wall. Used if the agent can neither slip nor
+        rebound from walls.
+
+        Returns:
+            bool: whether the agent slipped (always False)
+        """
+        # choose new agent direction according to minigrid.DIR_TO_VEC
+        self.agent_dir = self._ACT_TO_DIR[int(action)]
+        cur_x, cur_y = self.agent_pos
+        dir_x, dir_y = _DIR_TO_VEC_T[self.agent_dir]
+        fwd_pos = (cur_x + dir_x, cur_y + dir_y)
+
+        if self._walkable[fwd_pos]:
+            self.agent_pos = fwd_pos
+        return False
+
+    def _move_general(self, action):
+        """Moves the agent in the direction given by the action, including
+        slipping and rebounding from walls. The random draws use the
+        scalar Python RNG (see seed()).
+
+        Returns:
+            bool: whether the agent slipped
+        """
+        walkable = self._walkable
+
+        # choose new agent direction according to minigrid.DIR_TO_VEC
+        self.agent_dir = self._ACT_TO_DIR[int(action)]
+
+        # Get the tile in front of the agent
+        # (positions are plain (x, y) tuples)
+        cur_x, cur_y = self.agent_pos
+        dir_x, dir_y = _DIR_TO_VEC_T[self.agent_dir]
+        fwd_pos = (cur_x + dir_x, cur_y + dir_y)
+
+        # check if the agent slips in this step
+        # check explicitly that slipping is allowed
+        slip_now = False
+        if self.slip_proba > 0:
+            rnd_val = self._py_rng.random()
+            slip_now = rnd_val < self.slip_proba
+
+        # move one step and get the reward
+
+        if walkable[fwd_pos] and not slip_now:
+            self.agent_pos = fwd_pos
+        elif self.wall_rebound or slip_now:
+            # rebound/slip
+            # (currently: rebound on walls, closed doors, key, ball, box)
+            # rebound can happen behind agent pos/dir or on the sides
+            # slip can happen to either adjacent side
+            tmp_rebound_slip = [
+                # position behind the agent
+                (cur_x - dir_x, cur_y - dir_y),
+                # positions perpendicular to agent_dir
+                # and adjacent to agent_pos
+                (cur_x + dir_y, cur_y + dir_x),
+                (cur_x - dir_y, cur_y - dir_x),
+                # position in front of the agent
+                fwd_pos
+            ]
+
+            # get valid options for next cell
+            # (make sure the agent can be on the cell)
+            rebound_slip_options = [
+                candidate for candidate in tmp_rebound_slip
+                if walkable[candidate]
+            ]
+
+            # choose from valid candidates or keep current position if empty
+            if len(rebound_slip_options) > 0:
+                index = self._py_rng.randrange(len(rebound_slip_options))
+                self.agent_pos = rebound_slip_options[index]
+
+        return slip_now
+
+    def seed(self, seed=1337):
+        """Overrides MiniGridEnv.seed() to additionally seed a Python RNG.
+
+        The scalar draws in step() (slipping, rebound/slip cell) use
+        random.Random, which is considerably cheaper per call than the
+        NumPy generator. Both RNGs are seeded with the same seed, so
+        episodes stay reproducible, but the random stream differs from
+        drawing with self.np_random.
+        """
+        seeds = super().seed(seed=seed)
+        self._py_rng = random.Random(seeds[0])
+        return seeds
+
     def render(self, mode='human', close=False, highlight=False, tile_size=...):
         """Override render method to not highlight cells by default.
         Highlighted cells might confuse users as they suggest that the agent
@@ -315,8 +463,7 @@ class RiskyPathEnv(MiniGridEnv):
     def can_move(self):
         """Make sure that the agent can move from its current position.
         This is especially useful when absorbing states are activated."""
-        return self.grid.get(*self.agent_pos) is None \
-            or not self.grid.get(*self.agent_pos).type in ['goal', 'lava']
+        return self._type_map[self.agent_pos] not in _ABSORB_TILES
 
     @property
     def tensor_observation_space(self):
@@ -331,7 +478,26 @@ class RiskyPathEnv(MiniGridEnv):
         else:
             # reduce dimension by 1 (no spiky tiles)
             shape = (self.grid.width, self.grid.height, 4)
-        return spaces.Box(low=0, high=1, shape=shape, dtype=int), shape
+        # binary masks, uint8 keeps the observations small
+        return spaces.Box(low=0, high=1, shape=shape, dtype=np.uint8), shape
+
+    def _compute_static_tensor(self):
+        """Computes the tile channels of the tensor observation.
+
+        Walls, lava, goal and spiky tiles never move after the grid has been
+        generated, which is why this is done once per grid instead of once
+        per observation. The agent channel is left empty.
+
+        Returns:
+            NDArray: tensor with all channels except the agent channel set
+        """
+        obs_space, obs_shape = self.tensor_observation_space
+        static_tensor = np.zeros(obs_shape, dtype=obs_space.dtype)
+
+        # channel i (i > 0) holds the tiles with code i (see TILE_TO_IDX)
+        static_tensor[..., 1:] = \
+            self._type_map[..., None] == np.arange(1, obs_shape[2])
+        return static_tensor
 
     def tensor_obs(self):
         """Returns a (full) tensor observation of the environment.
@@ -340,33 +506,50 @@ class RiskyPathEnv(MiniGridEnv):
         when there is no specified reward/penalty for spiky tiles, they
         are not considered in the computation of the tensor.
 
+        Only the agent channel of an internal tensor is updated per call
+        (clear the previous agent cell, set the current one). The returned
+        tensor is a copy, so it does not alias the internal tensor. If an
+        observation buffer is set (see set_obs_buffer()), the observation
+        is written into it and the buffer itself is returned.
+
         Returns:
             NDArray: environment's tensor observation
         """
-        obs_shape = self.tensor_observation_space[1]
-        tensor_obs = np.zeros(obs_shape, dtype=int)
         # 0 is agent position
         # 1 is wall positions
         # 2 is lava positions
         # 3 is goal positions
         # (4 is spiky floor position)
         agent_x, agent_y = self.agent_pos
-        tensor_obs[agent_x, agent_y, 0] = 1
-
-        for x in range(self.grid.width):
-            for y in range(self.grid.height):
-                current_cell = self.grid.get(x, y)
-                if current_cell is not None:
-                    if current_cell.type == "wall":
-                        tensor_obs[x, y, 1] = 1
-                    elif current_cell.type == "lava":
-                        tensor_obs[x, y, 2] = 1
-                    elif current_cell.type == "goal":
-                        tensor_obs[x, y, 3] = 1
-                    # next block only executes if spiky tiles have been set
-                    elif current_cell.type == "spiky_floor":
-                        tensor_obs[x, y, 4] = 1
-        return tensor_obs
+        if self._last_agent_xy != (agent_x, agent_y):
+            if self._last_agent_xy is not None:
+                last_x, last_y = self._last_agent_xy
+                self._tensor_buf[last_x, last_y, 0] = 0
+            self._tensor_buf[agent_x, agent_y, 0] = 1
+            self._last_agent_xy = (agent_x, agent_y)
+
+        if self._obs_buf is not None:
+            np.copyto(self._obs_buf, self._tensor_buf)
+            return self._obs_buf
+        return self._tensor_buf.copy()
+
+    def set_obs_buffer(self, buf):
+        """Sets a preallocated array tensor_obs() writes into.
+
+        This avoids allocating a new array per observation. The buffer is
+        overwritten by every call of tensor_obs(), so copy the returned
+        observation if it has to be kept across steps.
+
+        Args:
+            buf (NDArray, optional): array with the shape and dtype of the
+                tensor observation space, e.g. a slice of a larger batch
+                array. None restores returning copies.
+        """
+        if buf is not None:
+            obs_space, obs_shape = self.tensor_observation_space
+            assert buf.shape == obs_shape, "Buffer shape does not match"
+            assert buf.dtype == obs_space.dtype, "Buffer dtype does not match"
+        self._obs_buf = buf
 
 # -------* Registration *-------
 
@@ -0,0 +1,223 @@
+from typing import NamedTuple
+
+import jax
+import jax.numpy as jnp
+
+from gym_minigrid.envs.risky import *
+from gym_minigrid.envs.risky import _GOAL, _LAVA, _SPIKY, _WALL
+
+# JAX is an optional dependency, which is why this module is not imported
+# by gym_minigrid.envs. Import RiskyPathJaxEnv from here directly.
+
+class EnvState(NamedTuple):
+    """State of a single RiskyPath environment (a JAX pytree)."""
+    pos: jnp.ndarray
+    dir: jnp.ndarray
+    step_count: jnp.ndarray
+
+class RiskyPathJaxEnv:
+    """RiskyPathEnv reimplemented with pure JAX functions.
+
+    The API follows gymnax: the environment object only holds the static
+    configuration, all state is passed in and returned explicitly, and
+    step() resets finished episodes automatically. Transitions follow the
+    same logic as RiskyPathEnv.step(), observations are the tensor
+    observations of RiskyPathEnv.tensor_obs().
+
+    The grid layout is encoded as an int8 tile array that is captured as a
+    constant when the functions are traced, so everything stays on the
+    device. v_reset and v_step are jitted versions of reset and step that
+    are vectorized over a batch of keys, states and actions. rollout is the
+    jitted version of _rollout, running a whole rollout in one call.
+    """
+
+    def __init__(self, **env_kwargs):
+        """Initialize the environment.
+
+        Args:
+            **env_kwargs: keyword arguments passed on to RiskyPathEnv.
+        """
+        # The layout does not depend on the RNG, a single environment
+        # generates the grid and holds the environment configuration
+        self.env = RiskyPathEnv(**env_kwargs)
+        self.tiles = jnp.asarray(self.env._type_map)
+        self.static_obs = jnp.asarray(self.env._static_tensor)
+
+        self.max_steps = self.env.max_steps
+        self.slip_proba = self.env.slip_proba
+        self.wall_rebound = self.env.wall_rebound
+        self.absorbing = self.env._absorbing
+        self.agent_start_pos = jnp.asarray(
+            self.env.agent_start_pos, dtype=jnp.int32
+        )
+
+        self.dir_to_vec = jnp.asarray(np.array(DIR_TO_VEC), dtype=jnp.int32)
+        self.act_to_dir = jnp.asarray(RiskyPathEnv._ACT_TO_DIR, dtype=jnp.int32)
+
+        self.v_reset = jax.jit(jax.vmap(self.reset))
+        self.v_step = jax.jit(jax.vmap(self.step))
+        self.rollout = jax.jit(self._rollout, static_argnums=(0, 2))
+
+    @property
+    def num_actions(self):
+        return len(RiskyPathEnv.Actions)
+
+    @property
+    def action_space(self):
+        return self.env.action_space
+
+    @property
+    def observation_space(self):
+        return self.env.tensor_observation_space[0]
+
+    def reset(self, key):
+        """Returns the initial observation and state.
+
+        Args:
+            key: PRNG key (unused, the start state is deterministic).
+
+        Returns:
+            (observation, state)
+        """
+        state = EnvState(
+            pos=self.agent_start_pos,
+            dir=jnp.int32(3),
+            step_count=jnp.int32(0)
+        )
+        return self.get_obs(state), state
+
+    def step(self, key, state, action):
+        """Performs a step and resets the environment if it is done.
+
+        Returns:
+            (observation, state, reward, done, info)
+        """
+        obs, state, reward, done, info = self.step_env(key, state, action)
+        reset_obs, reset_state = self.reset(key)
+        state = jax.tree_util.tree_map(
+            lambda r, s: jnp.where(done, r, s), reset_state, state
+        )
+        obs = jnp.where(done, reset_obs, obs)
+        return obs, state, reward, done, info
+
+    def step_env(self, key, state, action):
+        """Performs a step without resetting finished episodes.
+
+        Returns:
+            (observation, state, reward, done, info)
+        """
+        tiles = self.tiles
+        pos = state.pos
+        slip_key, choice_key = jax.random.split(key)
+
+        # agents in absorbing states (goal, lava) cannot move
+        cur_tile = tiles[pos[0], pos[1]]
+        can_move = (cur_tile != _GOAL) & (cur_tile != _LAVA)
+
+        agent_dir = jnp.where(can_move, self.act_to_dir[action], state.dir)
+        dir_vec = self.dir_to_vec[agent_dir]
+        fwd_pos = pos + dir_vec
+        fwd_free = tiles[fwd_pos[0], fwd_pos[1]] != _WALL
+
+        if self.slip_proba > 0:
+            slipped = can_move \
+                & (jax.random.uniform(slip_key) < self.slip_proba)
+        else:
+            slipped = jnp.bool_(False)
+        move_fwd = can_move & fwd_free & ~slipped
+
+        # rebound/slip to one of the walkable cells adjacent to the agent
+        # (behind, both sides, front)
+        side_dir = dir_vec[::-1]
+        candidates = jnp.stack([
+            pos - dir_vec,
+            pos + side_dir,
+            pos - side_dir,
+            fwd_pos
+        ])
+        valid = tiles[candidates[:, 0], candidates[:, 1]] != _WALL
+        num_valid = valid.sum()
+        # pick the k-th valid candidate with k uniform over valid ones
+        k = jnp.floor(jax.random.uniform(choice_key) * num_valid)
+        picked = valid & (jnp.cumsum(valid) - 1 == k)
+        rebound_pos = jnp.where(
+            num_valid > 0, candidates[jnp.argmax(picked)], pos
+        )
+        rebound_slip = can_move & ~move_fwd & (slipped | self.wall_rebound)
+
+        new_pos = jnp.where(
+            move_fwd, fwd_pos, jnp.where(rebound_slip, rebound_pos, pos)
+        )
+
+        # check for cells and corresponding rewards / episode end
+        new_tile = tiles[new_pos[0], new_pos[1]]
+        is_goal = new_tile == _GOAL
+        is_lava = new_tile == _LAVA
+        if self.absorbing:
+            reward = jnp.where(is_goal, self.env._r_abs_goal, 0.) \
+                + jnp.where(is_lava, self.env._r_abs_lava, 0.)
+            done = jnp.bool_(False)
+        else:
+            reward = jnp.where(is_goal, self.env._r_goal, 0.) \
+                + jnp.where(is_lava, self.env._r_lava, 0.)
+            done = is_goal | is_lava
+        reward = reward + self.env._r_step \
+            + jnp.where(new_tile == _SPIKY, self.env._r_spiky, 0.)
+
+        # finish the step
+        step_count = state.step_count + 1
+        done = done | (step_count >= self.max_steps)
+
+        state = EnvState(pos=new_pos, dir=agent_dir, step_count=step_count)
+        info = {
+            "agent_pos" : new_pos,
+            "previous_pos" : pos,
+            "slipped" : slipped,
+            # TILE_TO_IDX codes instead of type strings
+            "current_cell_type" : new_tile
+        }
+        return self.get_obs(state), state, reward, done, info
+
+    def _rollout(self, policy_apply, key, length):
+        """Resets the environment and performs length steps with a policy.
+
+        The steps run inside jax.lax.scan, so the whole rollout is a single
+        compiled computation without Python overhead per step. Finished
+        episodes are reset automatically (see step()).
+
+        Args:
+            policy_apply: function (key, observation) -> action. Must be
+                hashable, as it is a static argument of the jitted rollout.
+            key: PRNG key.
+            length (int): number of steps.
+
+        Returns:
+            (state, transitions): the final state and a dict of the stacked
+            observations, actions, rewards and dones of all steps
+        """
+        key, reset_key = jax.random.split(key)
+        obs, state = self.reset(reset_key)
+
+        def body(carry, _):
+            obs, state, key = carry
+            key, policy_key, step_key = jax.random.split(key, 3)
+            action = policy_apply(policy_key, obs)
+            next_obs, state, reward, done, _ = self.step(
+                step_key, state, action
+            )
+            transition = {
+                "obs" : obs,
+                "action" : action,
+                "reward" : reward,
+                "done" : done
+            }
+            return (next_obs, state, key), transition
+
+        (_, state, _), transitions = jax.lax.scan(
+            body, (obs, state, key), None, length=length
+        )
+        return state, transitions
+
+    def get_obs(self, state):
+        """Returns the tensor observation of the given state."""
+        return self.static_obs.at[state.pos[0], state.pos[1], 0].set(1)
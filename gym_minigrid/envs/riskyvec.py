@@ -0,0 +1,421 @@
+from gym.vector import VectorEnv
+
+from gym_minigrid.envs.risky import *
+from gym_minigrid.envs.risky import _GOAL, _LAVA, _SPIKY, _WALL
+
+# Numba is optional, without it the NumPy implementation is used
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
+
+NUMBA_AVAILABLE = njit is not None
+
+# Direction vectors and action to direction table as arrays for batch indexing
+DIR_TO_VEC_ARR = np.array(DIR_TO_VEC, dtype=np.int32)
+# Direction vectors with swapped components (perpendicular up to sign)
+PERP_DIR_TO_VEC_ARR = np.ascontiguousarray(DIR_TO_VEC_ARR[:, ::-1])
+ACT_TO_DIR_ARR = np.array(RiskyPathEnv._ACT_TO_DIR, dtype=np.int8)
+
+# Indices into the reward array passed to the kernels
+_R_STEP, _R_GOAL, _R_LAVA, _R_SPIKY, _R_ABS_GOAL, _R_ABS_LAVA = range(6)
+
+def _risky_step(
+    x,
+    y,
+    agent_dir,
+    action,
+    tiles,
+    slip_val,
+    choice_val,
+    slip_proba,
+    wall_rebound,
+    absorbing,
+    rewards
+):
+    """Transition kernel of a single RiskyPath environment.
+
+    Mirrors RiskyPathEnv.step() on integer state. Instead of an RNG, the
+    uniform random numbers for slipping (slip_val) and for choosing a
+    rebound/slip cell (choice_val) are passed in.
+
+    Returns:
+        (x, y, agent_dir, reward, done, tile, slipped)
+    """
+    reward = rewards[_R_STEP]
+    done = False
+    slipped = False
+
+    tile = tiles[x, y]
+    if tile != _GOAL and tile != _LAVA:
+        agent_dir = ACT_TO_DIR_ARR[action]
+        dx = DIR_TO_VEC_ARR[agent_dir, 0]
+        dy = DIR_TO_VEC_ARR[agent_dir, 1]
+        slipped = slip_proba > 0 and slip_val < slip_proba
+
+        if tiles[x + dx, y + dy] != _WALL and not slipped:
+            x += dx
+            y += dy
+        elif wall_rebound or slipped:
+            # candidates: behind, both sides, front
+            cand_x = (x - dx, x + dy, x - dy, x + dx)
+            cand_y = (y - dy, y + dx, y - dx, y + dy)
+            num_valid = 0
+            for i in range(4):
+                if tiles[cand_x[i], cand_y[i]] != _WALL:
+                    num_valid += 1
+            # pick the k-th valid candidate with k uniform over valid ones
+            k = int(choice_val * num_valid)
+            for i in range(4):
+                if tiles[cand_x[i], cand_y[i]] != _WALL:
+                    if k == 0:
+                        x = cand_x[i]
+                        y = cand_y[i]
+                        break
+                    k -= 1
+
+    tile = tiles[x, y]
+    if tile == _GOAL:
+        if absorbing:
+            reward += rewards[_R_ABS_GOAL]
+        else:
+            done = True
+            reward += rewards[_R_GOAL]
+    elif tile == _LAVA:
+        if absorbing:
+            reward += rewards[_R_ABS_LAVA]
+        else:
+            done = True
+            reward += rewards[_R_LAVA]
+    elif tile == _SPIKY:
+        reward += rewards[_R_SPIKY]
+
+    return x, y, agent_dir, reward, done, tile, slipped
+
+def _risky_step_batch(
+    pos,
+    dirs,
+    actions,
+    tiles,
+    slip_vals,
+    choice_vals,
+    slip_proba,
+    wall_rebound,
+    absorbing,
+    rewards,
+    out_rewards,
+    out_dones,
+    out_tiles,
+    out_slipped
+):
+    """Applies _risky_step() to every environment, updating pos and dirs
+    in place and writing the remaining results to the out_* arrays."""
+    for i in prange(pos.shape[0]):
+        x, y, agent_dir, reward, done, tile, slipped = _risky_step(
+            pos[i, 0],
+            pos[i, 1],
+            dirs[i],
+            actions[i],
+            tiles,
+            slip_vals[i],
+            choice_vals[i],
+            slip_proba,
+            wall_rebound,
+            absorbing,
+            rewards
+        )
+        pos[i, 0] = x
+        pos[i, 1] = y
+        dirs[i] = agent_dir
+        out_rewards[i] = reward
+        out_dones[i] = done
+        out_tiles[i] = tile
+        out_slipped[i] = slipped
+
+if NUMBA_AVAILABLE:
+    _risky_step = njit(cache=True)(_risky_step)
+    _risky_step_batch = njit(cache=True, parallel=True)(_risky_step_batch)
+
+class RiskyPathVecEnv(VectorEnv):
+    """Batched version of RiskyPathEnv stepping all environments at once.
+
+    All sub-environments share the same (static) grid layout. Their state is
+    kept as arrays (structure of arrays) and every step is computed with
+    vectorized NumPy operations instead of stepping each environment in
+    Python. Observations are tensor observations as returned by
+    RiskyPathEnv.tensor_obs(), batched along the first axis.
+
+    With use_numba, the transitions are computed by a Numba compiled kernel
+    running over the sub-environments in parallel. Both implementations
+    produce identical results for the same seed.
+
+    Sub-environments whose episode ended are reset automatically within the
+    same step() call. The returned observation then is the initial
+    observation of the new episode; info["agent_pos"] still contains the
+    final agent position of the finished episode.
+    """
+
+    def __init__(
+        self,
+        num_envs,
+        seed=1337,
+        use_numba=NUMBA_AVAILABLE,
+        **env_kwargs
+    ):
+        """Initialize num_envs RiskyPath environments.
+
+        Args:
+            num_envs (int): number of sub-environments.
+            seed (int): The seed for the RNG shared by all sub-environments.
+            use_numba (bool): Whether to step with the Numba kernel.
+                Defaults to True if Numba is installed.
+            **env_kwargs: keyword arguments passed on to RiskyPathEnv.
+        """
+        assert NUMBA_AVAILABLE or not use_numba, "Numba is not installed"
+        self.use_numba = use_numba
+
+        # The layout does not depend on the RNG, a single environment
+        # generates the grid and holds the environment configuration
+        self.env = RiskyPathEnv(seed=seed, **env_kwargs)
+        self.tiles = self.env._type_map
+        self.walkable = self.env._walkable
+
+        self.max_steps = self.env.max_steps
+        self.slip_proba = self.env.slip_proba
+        self.wall_rebound = self.env.wall_rebound
+        self.agent_start_pos = self.env.agent_start_pos
+        self.rewards = np.array([
+            self.env._r_step,
+            self.env._r_goal,
+            self.env._r_lava,
+            self.env._r_spiky,
+            self.env._r_abs_goal,
+            self.env._r_abs_lava
+        ], dtype=np.float64)
+
+        # Sub-environment states
+        self.pos = np.empty((num_envs, 2), dtype=np.int32)
+        self.dir = np.empty(num_envs, dtype=np.int8)
+        self.done = np.zeros(num_envs, dtype=bool)
+        self.step_count = np.zeros(num_envs, dtype=np.int32)
+
+        super().__init__(
+            num_envs,
+            self.env.tensor_observation_space[0],
+            self.env.action_space
+        )
+
+        self.seed(seed)
+        self._actions = None
+        self._obs_buf = None
+
+    def seed(self, seed=None):
+        """Seeds the RNG shared by all sub-environments."""
+        self.np_random, seed = seeding.np_random(seed)
+        return [seed]
+
+    def reset_wait(self, seed=None, return_info=False, options=None):
+        if seed is not None:
+            self.seed(seed)
+
+        self._reset_envs(np.ones(self.num_envs, dtype=bool))
+        obs = self._tensor_obs()
+
+        if return_info:
+            return obs, {}
+        return obs
+
+    def step_async(self, actions):
+        self._actions = np.asarray(actions)
+
+    def step_wait(self):
+        """Steps all sub-environments with the actions from step_async().
+
+        Follows the same transition and reward logic as RiskyPathEnv.step().
+
+        Returns:
+            (observations, rewards, dones, info)
+        """
+        actions = self._actions
+        num_envs = self.num_envs
+
+        assert actions.shape == (num_envs,), "Expected one action per env."
+        assert np.all((actions >= 0) & (actions < len(ACT_TO_DIR_ARR))), \
+            "Unknown action."
+
+        # Draw the random numbers for all sub-environments so that the
+        # RNG stream does not depend on which of them slip or rebound
+        if self.slip_proba > 0:
+            slip_vals = self.np_random.random(num_envs)
+        else:
+            slip_vals = np.ones(num_envs)
+        if self.slip_proba > 0 or self.wall_rebound:
+            choice_vals = self.np_random.random(num_envs)
+        else:
+            choice_vals = np.zeros(num_envs)
+
+        previous_pos = self.pos.copy()
+        if self.use_numba:
+            rewards, dones, new_tiles, slipped = self._step_numba(
+                actions, slip_vals, choice_vals
+            )
+        else:
+            rewards, dones, new_tiles, slipped = self._step_numpy(
+                actions, slip_vals, choice_vals
+            )
+
+        # finish the step
+        self.step_count += 1
+        dones |= self.step_count >= self.max_steps
+        self.done = dones
+
+        info = {
+            "agent_pos" : self.pos.copy(),
+            "previous_pos" : previous_pos,
+            "slipped" : slipped,
+            # TILE_TO_IDX codes instead of type strings
+            "current_cell_type" : new_tiles
+        }
+
+        if dones.any():
+            self._reset_envs(dones)
+
+        return self._tensor_obs(), rewards, dones, info
+
+    def _step_numba(self, actions, slip_vals, choice_vals):
+        """Moves the agents with the compiled kernel.
+
+        Returns:
+            (rewards, dones, tiles, slipped)
+        """
+        num_envs = self.num_envs
+        rewards = np.empty(num_envs, dtype=np.float64)
+        dones = np.empty(num_envs, dtype=bool)
+        new_tiles = np.empty(num_envs, dtype=np.int8)
+        slipped = np.empty(num_envs, dtype=bool)
+
+        _risky_step_batch(
+            self.pos,
+            self.dir,
+            actions,
+            self.tiles,
+            slip_vals,
+            choice_vals,
+            self.slip_proba,
+            self.wall_rebound,
+            self.env._absorbing,
+            self.rewards,
+            rewards,
+            dones,
+            new_tiles,
+            slipped
+        )
+        return rewards, dones, new_tiles, slipped
+
+    def _step_numpy(self, actions, slip_vals, choice_vals):
+        """Moves the agents with vectorized NumPy operations.
+
+        Returns:
+            (rewards, dones, tiles, slipped)
+        """
+        num_envs = self.num_envs
+        pos = self.pos
+        tiles = self.tiles
+        r = self.rewards
+
+        rewards = np.full(num_envs, r[_R_STEP], dtype=np.float64)
+
+        # agents in absorbing states (goal, lava) cannot move
+        cur_tiles = tiles[pos[:, 0], pos[:, 1]]
+        can_move = (cur_tiles != _GOAL) & (cur_tiles != _LAVA)
+
+        self.dir = np.where(can_move, ACT_TO_DIR_ARR[actions], self.dir)
+        dir_vec = DIR_TO_VEC_ARR[self.dir]
+        fwd_pos = pos + dir_vec
+        fwd_free = self.walkable[fwd_pos[:, 0], fwd_pos[:, 1]]
+
+        slipped = can_move & (slip_vals < self.slip_proba)
+        move_fwd = can_move & fwd_free & ~slipped
+        new_pos = np.where(move_fwd[:, None], fwd_pos, pos)
+
+        # rebound/slip to one of the walkable cells adjacent to the agent
+        # (behind, both sides, front)
+        rebound_slip = can_move & ~move_fwd & (slipped | self.wall_rebound)
+        if rebound_slip.any():
+            idx = np.flatnonzero(rebound_slip)
+            cur_pos = pos[idx]
+            cur_dir = dir_vec[idx]
+            side_dir = PERP_DIR_TO_VEC_ARR[self.dir[idx]]
+            candidates = np.stack([
+                cur_pos - cur_dir,
+                cur_pos + side_dir,
+                cur_pos - side_dir,
+                fwd_pos[idx]
+            ], axis=1)
+            valid = self.walkable[candidates[..., 0], candidates[..., 1]]
+
+            # pick the k-th valid candidate with k uniform over valid ones
+            num_valid = valid.sum(axis=1)
+            k = (choice_vals[idx] * num_valid).astype(np.int64)
+            picked = valid & (np.cumsum(valid, axis=1) - 1 == k[:, None])
+            has_options = num_valid > 0
+            new_pos[idx[has_options]] = candidates[
+                has_options, picked[has_options].argmax(axis=1)
+            ]
+
+        self.pos[:] = new_pos
+
+        # check for cells and corresponding rewards / episode end
+        new_tiles = tiles[new_pos[:, 0], new_pos[:, 1]]
+        is_goal = new_tiles == _GOAL
+        is_lava = new_tiles == _LAVA
+        if self.env._absorbing:
+            rewards += np.where(is_goal, r[_R_ABS_GOAL], 0)
+            rewards += np.where(is_lava, r[_R_ABS_LAVA], 0)
+            dones = np.zeros(num_envs, dtype=bool)
+        else:
+            rewards += np.where(is_goal, r[_R_GOAL], 0)
+            rewards += np.where(is_lava, r[_R_LAVA], 0)
+            dones = is_goal | is_lava
+        rewards += np.where(new_tiles == _SPIKY, r[_R_SPIKY], 0)
+
+        return rewards, dones, new_tiles, slipped
+
+    def _reset_envs(self, mask):
+        """Resets the sub-environments selected by the boolean mask."""
+        self.pos[mask] = self.agent_start_pos
+        self.dir[mask] = 3
+        self.step_count[mask] = 0
+
+    def set_obs_buffer(self, buf):
+        """Sets a preallocated array the batched observations are written to.
+
+        This avoids allocating a new array per step. The buffer is
+        overwritten by every reset() and step(), so copy the returned
+        observations if they have to be kept across steps.
+
+        Args:
+            buf (NDArray, optional): array with the shape and dtype of
+                self.observation_space. None restores allocating a new
+                array per step.
+        """
+        if buf is not None:
+            assert buf.shape == self.observation_space.shape, \
+                "Buffer shape does not match"
+            assert buf.dtype == self.observation_space.dtype, \
+                "Buffer dtype does not match"
+        self._obs_buf = buf
+
+    def _tensor_obs(self):
+        """Returns the batched tensor observations of all sub-environments."""
+        if self._obs_buf is not None:
+            obs = self._obs_buf
+        else:
+            obs = np.empty(
+                self.observation_space.shape,
+                dtype=self.observation_space.dtype
+            )
+        obs[:] = self.env._static_tensor
+        obs[np.arange(self.num_envs), self.pos[:, 0], self.pos[:, 1], 0] = 1
+        return obs
@@ -1,12 +1,18 @@
 from time import sleep
 import gym
+import numpy as np
+import pytest
 
 # import gym_minigrid to include registered environments 
 import gym_minigrid
 
 from PIL import Image
-from gym_minigrid.envs.risky import RiskyPathEnv
-from gym_minigrid.minigrid import TILE_PIXELS
+from gym_minigrid.envs.risky import (
+    ABSORBING_REWARD_LAVA, ABSORBING_STATES, DEFAULT_REWARDS, TILE_TO_IDX,
+    RewardSpec, RiskyPathEnv
+)
+from gym_minigrid.envs.riskyvec import RiskyPathVecEnv
+from gym_minigrid.minigrid import DIR_TO_VEC, TILE_PIXELS
 from gym_minigrid.wrappers import ImgObsWrapper, RGBImgObsWrapper, TensorObsWrapper
 
 def run_normal():
@@ -66,6 +72,265 @@ def test_tensor_obs():
     
     assert obs.shape == expected_shape
 
+def test_action_directions():
+    expected_vecs = {
+        RiskyPathEnv.Actions.west: (-1, 0),
+        RiskyPathEnv.Actions.north: (0, -1),
+        RiskyPathEnv.Actions.east: (1, 0),
+        RiskyPathEnv.Actions.south: (0, 1),
+    }
+    env = RiskyPathEnv()
+
+    for action, vec in expected_vecs.items():
+        env.reset()
+        env.step(action)
+        assert tuple(DIR_TO_VEC[env.agent_dir]) == vec
+
+def test_absorbing_lava():
+    reward_spec = dict(DEFAULT_REWARDS)
+    reward_spec[ABSORBING_STATES] = True
+    env = RiskyPathEnv(reward_spec=reward_spec)
+    env.reset()
+
+    # the column left of the start position is lava
+    _, reward, done, info = env.step(RiskyPathEnv.Actions.west)
+    assert info["current_cell_type"] == "lava"
+    assert reward == reward_spec[ABSORBING_REWARD_LAVA] and not done
+
+    lava_pos = tuple(env.agent_pos)
+    for action in RiskyPathEnv.Actions:
+        _, reward, done, info = env.step(action)
+        assert tuple(env.agent_pos) == lava_pos
+        assert not info["slipped"]
+        assert reward == reward_spec[ABSORBING_REWARD_LAVA] and not done
+
+def test_reward_spec_from_dict():
+    reward_spec = dict(DEFAULT_REWARDS)
+    reward_spec[ABSORBING_STATES] = True
+    env = RiskyPathEnv(reward_spec=reward_spec)
+    assert env.reward_spec == RewardSpec(absorbing_states=True)
+    assert RiskyPathEnv().reward_spec == RewardSpec(**DEFAULT_REWARDS)
+
+def test_slip_and_rebound_stay_adjacent():
+    env = RiskyPathEnv(slip_proba=0.5, wall_rebound=True, verbose_info=True)
+
+    for _ in range(5):
+        env.reset()
+        done = False
+        while not done:
+            previous_pos = env.agent_pos
+            _, _, done, info = env.step(env.action_space.sample())
+            assert type(env.agent_pos) is tuple
+            dx, dy = info["actual_movement_vec"]
+            assert abs(dx) + abs(dy) <= 1
+            cell = env.grid.get(*env.agent_pos)
+            assert cell is None or cell.can_overlap()
+            assert info["previous_pos"] == previous_pos
+
+def test_seeded_slip_reproducible():
+    actions = np.random.RandomState(0).randint(0, 4, 100)
+
+    def trajectory(env):
+        env.reset()
+        positions = []
+        for action in actions:
+            _, _, done, _ = env.step(action)
+            positions.append(env.agent_pos)
+            if done:
+                env.reset()
+        return positions
+
+    env = RiskyPathEnv(slip_proba=0.5, wall_rebound=True, seed=7)
+    first = trajectory(env)
+    assert first == trajectory(RiskyPathEnv(slip_proba=0.5, wall_rebound=True, seed=7))
+    env.seed(7)
+    assert first == trajectory(env)
+
+def test_verbose_info():
+    env = RiskyPathEnv()
+    env.reset()
+    _, _, _, info = env.step(RiskyPathEnv.Actions.north)
+    assert "actual_movement_vec" not in info
+
+    env = RiskyPathEnv(verbose_info=True)
+    env.reset()
+    _, _, _, info = env.step(RiskyPathEnv.Actions.north)
+    assert tuple(info["actual_movement_vec"]) == (0, -1)
+    assert tuple(info["intended_movement_vec"]) == (0, -1)
+
+def test_tensor_obs_matches_grid():
+    channels = {"wall": 1, "lava": 2, "goal": 3, "spiky_floor": 4}
+
+    for spiky_active in [False, True]:
+        env = RiskyPathEnv(spiky_active=spiky_active)
+        env.reset()
+
+        for _ in range(30):
+            tensor_obs = env.tensor_obs()
+            assert tensor_obs.dtype == env.tensor_observation_space[0].dtype
+
+            expected = np.zeros(env.tensor_observation_space[1], dtype=int)
+            expected[env.agent_pos[0], env.agent_pos[1], 0] = 1
+            for x in range(env.grid.width):
+                for y in range(env.grid.height):
+                    cell = env.grid.get(x, y)
+                    if cell is not None and cell.type in channels:
+                        expected[x, y, channels[cell.type]] = 1
+
+            assert np.array_equal(tensor_obs, expected)
+
+            _, _, done, _ = env.step(env.action_space.sample())
+            if done:
+                env.reset()
+
+def test_obs_buffer():
+    env = RiskyPathEnv()
+    env.reset()
+    obs_space, obs_shape = env.tensor_observation_space
+    batch = np.zeros((2,) + obs_shape, dtype=obs_space.dtype)
+    env.set_obs_buffer(batch[1])
+
+    for _ in range(10):
+        env.step(env.action_space.sample())
+        obs = env.tensor_obs()
+        assert np.shares_memory(obs, batch)
+        env.set_obs_buffer(None)
+        assert np.array_equal(batch[1], env.tensor_obs())
+        env.set_obs_buffer(batch[1])
+
+    vec_env = RiskyPathVecEnv(4)
+    buf = np.empty(vec_env.observation_space.shape, vec_env.observation_space.dtype)
+    vec_env.set_obs_buffer(buf)
+    obs = vec_env.reset()
+    assert obs is buf
+    obs, _, _, _ = vec_env.step(vec_env.action_space.sample())
+    assert obs is buf
+    vec_env.set_obs_buffer(None)
+    assert np.array_equal(vec_env._tensor_obs(), buf)
+
+def test_vec_env_matches_single_envs():
+    num_envs = 4
+    vec_env = RiskyPathVecEnv(num_envs, spiky_active=True)
+    envs = [RiskyPathEnv(spiky_active=True) for _ in range(num_envs)]
+
+    obs = vec_env.reset()
+    for i, env in enumerate(envs):
+        env.reset()
+        assert np.array_equal(obs[i], env.tensor_obs())
+
+    for _ in range(200):
+        actions = vec_env.action_space.sample()
+        obs, rewards, dones, info = vec_env.step(actions)
+        for i, env in enumerate(envs):
+            _, reward, done, env_info = env.step(actions[i])
+            assert tuple(info["agent_pos"][i]) == env.agent_pos
+            assert rewards[i] == reward and dones[i] == done
+            if done:
+                env.reset()
+            assert np.array_equal(obs[i], env.tensor_obs())
+
+def test_vec_env_slip_and_rebound():
+    vec_env = RiskyPathVecEnv(16, slip_proba=0.5, wall_rebound=True)
+    vec_env.reset()
+
+    for _ in range(200):
+        previous_pos = vec_env.pos.copy()
+        _, _, dones, info = vec_env.step(vec_env.action_space.sample())
+        assert np.array_equal(info["previous_pos"], previous_pos)
+        moved = np.abs(info["agent_pos"] - previous_pos).sum(axis=1)
+        assert np.all(moved <= 1)
+        tiles = vec_env.tiles[info["agent_pos"][:, 0], info["agent_pos"][:, 1]]
+        assert np.all(tiles != TILE_TO_IDX["wall"])
+
+def test_vec_env_numba_matches_numpy():
+    pytest.importorskip("numba")
+    reward_spec = dict(DEFAULT_REWARDS)
+    reward_spec[ABSORBING_STATES] = True
+
+    for kwargs in [
+        dict(slip_proba=0.3, wall_rebound=True),
+        dict(slip_proba=0.3, reward_spec=reward_spec),
+        dict(wall_rebound=True, spiky_active=True),
+    ]:
+        numpy_env = RiskyPathVecEnv(32, use_numba=False, **kwargs)
+        numba_env = RiskyPathVecEnv(32, use_numba=True, **kwargs)
+        numpy_obs = numpy_env.reset()
+        numba_obs = numba_env.reset()
+        assert np.array_equal(numpy_obs, numba_obs)
+
+        for _ in range(100):
+            actions = numpy_env.action_space.sample()
+            numpy_result = numpy_env.step(actions)
+            numba_result = numba_env.step(actions)
+            for numpy_val, numba_val in zip(numpy_result[:3], numba_result[:3]):
+                assert np.array_equal(numpy_val, numba_val)
+            for key, numpy_val in numpy_result[3].items():
+                assert np.array_equal(numpy_val, numba_result[3][key])
+
+def test_jax_env_matches_single_env():
+    jax = pytest.importorskip("jax")
+    from gym_minigrid.envs.riskyjax import RiskyPathJaxEnv
+
+    jax_env = RiskyPathJaxEnv(spiky_active=True)
+    env = RiskyPathEnv(spiky_active=True)
+    env.reset()
+    key = jax.random.PRNGKey(0)
+    step = jax.jit(jax_env.step)
+
+    obs, state = jax_env.reset(key)
+    assert np.array_equal(obs, env.tensor_obs())
+
+    for _ in range(200):
+        key, step_key = jax.random.split(key)
+        action = env.action_space.sample()
+        obs, state, reward, done, info = step(step_key, state, action)
+        _, env_reward, env_done, _ = env.step(action)
+        assert tuple(np.asarray(info["agent_pos"])) == env.agent_pos
+        assert np.isclose(reward, env_reward) and done == env_done
+        if env_done:
+            env.reset()
+        assert np.array_equal(obs, env.tensor_obs())
+
+def test_jax_vec_step():
+    jax = pytest.importorskip("jax")
+    from gym_minigrid.envs.riskyjax import RiskyPathJaxEnv
+
+    num_envs = 16
+    jax_env = RiskyPathJaxEnv(slip_proba=0.5, wall_rebound=True)
+    keys = jax.random.split(jax.random.PRNGKey(0), num_envs)
+    obs, state = jax_env.v_reset(keys)
+    assert obs.shape == (num_envs,) + jax_env.observation_space.shape
+
+    for _ in range(100):
+        keys = jax.random.split(keys[0], num_envs)
+        actions = jax.random.randint(keys[0], (num_envs,), 0, 4)
+        previous_pos = np.asarray(state.pos)
+        obs, state, _, _, info = jax_env.v_step(keys, state, actions)
+        moved = np.abs(np.asarray(info["agent_pos"]) - previous_pos).sum(axis=1)
+        assert np.all(moved <= 1)
+
+def test_jax_rollout():
+    jax = pytest.importorskip("jax")
+    from gym_minigrid.envs.riskyjax import RiskyPathJaxEnv
+
+    def go_north(key, obs):
+        return RiskyPathEnv.Actions.north.value
+
+    length = 200
+    jax_env = RiskyPathJaxEnv()
+    _, transitions = jax_env.rollout(go_north, jax.random.PRNGKey(0), length)
+    assert transitions["obs"].shape == (length,) + jax_env.observation_space.shape
+
+    env = RiskyPathEnv()
+    env.reset()
+    for i in range(length):
+        assert np.array_equal(transitions["obs"][i], env.tensor_obs())
+        _, reward, done, _ = env.step(RiskyPathEnv.Actions.north)
+        assert np.isclose(transitions["reward"][i], reward)
+        assert transitions["done"][i] == done
+        if done:
+            env.reset()
+
 def test_full_rgb_obs():
     env = gym.make("MiniGrid-RiskyPath-v0")
     env = RGBImgObsWrapper(env, tile_size=32)